@@ -1,19 +1,35 @@
 from fastapi import FastAPI, Query, HTTPException, status
-import requests
-import redis
-import json
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+import asyncio
+import contextlib
+import httpx
+import redis.asyncio as aioredis
+import orjson
 import hashlib
+import functools
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterable, Tuple, Literal
 import re
-from collections import Counter
-from requests.exceptions import HTTPError, RequestException
-STOPWORDS = {
+from collections import Counter, OrderedDict, defaultdict
+from itertools import chain
+import time
+import logging
+STOPWORDS = frozenset({
     "the","of","and","in","for","on","with","to","a","an","by","from","at","as",
     "is","are","be","this","that","using","use","based","via","into","between",
     "study","analysis","approach","method","methods","review","system","model",
     "models","data","application","applications"
-}
+})
+
+# tokenizer judul: ambil huruf aja, lowercase per token
+_TOKEN_RE = re.compile(r"[A-Za-z]+")
+
+# jalur cepat buat judul ASCII: selain huruf -> spasi, lalu split
+_ASCII_LETTERS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ")
+_TRANS = str.maketrans({
+    chr(i): " " for i in range(256) if chr(i) not in _ASCII_LETTERS
+})
 
 # ===== Standard Error Definitions (Numeric Codes) =====
 
@@ -45,39 +61,269 @@ ERROR_INTERNAL = {
     "description": "An unexpected error occurred on the server."
 }
 
-app = FastAPI(title="Research Metadata API", version="1.0.0")
+app = FastAPI(
+    title="Research Metadata API",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+# ===== Request Bodies
+
+BATCH_LOOKUP_MAX = 50
+
+# karakter yang punya arti di sintaks filter OpenAlex
+FILTER_UNSAFE_RE = re.compile(r"[,|]")
+
+
+class BatchLookupRequest(BaseModel):
+    dois: List[str]
 
 # ===== Redis Server 
 REDIS_HOST = os.getenv("REDIS_HOST", "redis-cache")
 REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 
-redis_client = redis.Redis(
+# timeout pendek: Redis lambat/mati jangan sampai nahan event loop
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+REDIS_CONNECT_TIMEOUT = float(os.getenv("REDIS_CONNECT_TIMEOUT", 0.5))
+
+redis_client = aioredis.Redis(
     host=REDIS_HOST,
     port=REDIS_PORT,
     db=0,
-    decode_responses=True
+    decode_responses=False,  # payload orjson (bytes)
+    socket_timeout=REDIS_SOCKET_TIMEOUT,
+    socket_connect_timeout=REDIS_CONNECT_TIMEOUT,
 )
+
+# ===== HTTP Client (shared, dibuat saat startup)
+USER_AGENT = "ResearchMetadataAPI/1.0 (mailto:fathoniadam933@gmail.com)"
+
+# minta field yang dipakai normalizer aja (payload jauh lebih kecil)
+OPENALEX_SELECT = "title,publication_year,doi,authorships"
+CROSSREF_SELECT = "title,author,issued,DOI"
+
+# OpenAlex boleh sampai 200 per halaman
+OPENALEX_MAX_PER_PAGE = 200
+
+# tiered search: CrossRef di-skip kalau OpenAlex udah nutup >= 80% limit
+TIERED_MIN_RATIO = 0.8
+
+# pool koneksi keep-alive ke api.openalex.org / api.crossref.org
+HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+HTTP_CONNECT_RETRIES = 2
+
+# retry singkat kalau upstream lagi 502/503/504
+RETRY_STATUSES = {502, 503, 504}
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.2
+
+# batas request paralel per host (OpenAlex limit ~10 req/detik)
+_OA_SEM = asyncio.Semaphore(8)
+_CR_SEM = asyncio.Semaphore(8)
+
+_UPSTREAM_SEMS = {
+    "api.openalex.org": _OA_SEM,
+    "api.crossref.org": _CR_SEM,
+}
+
+http_client: httpx.AsyncClient | None = None
+
+
+@app.on_event("startup")
+async def startup_http_client():
+    global http_client
+    http_client = httpx.AsyncClient(
+        timeout=15,
+        headers={"User-Agent": USER_AGENT},
+        # limits harus di transport, kalau transport custom limits client diabaikan
+        transport=httpx.AsyncHTTPTransport(
+            retries=HTTP_CONNECT_RETRIES,
+            limits=HTTP_LIMITS,
+        ),
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    if http_client is not None:
+        await http_client.aclose()
+    await redis_client.aclose()
+
+
+async def _limited_get(url: str, params: dict | None = None) -> httpx.Response:
+    sem = _UPSTREAM_SEMS.get(httpx.URL(url).host, contextlib.nullcontext())
+    async with sem:
+        return await http_client.get(url, params=params)
+
+
+async def upstream_get(url: str, params: dict | None = None) -> httpx.Response:
+    r = await _limited_get(url, params=params)
+
+    for attempt in range(RETRY_TOTAL):
+        if r.status_code not in RETRY_STATUSES:
+            break
+        # semaphore dilepas selama backoff
+        await asyncio.sleep(RETRY_BACKOFF * (2 ** attempt))
+        r = await _limited_get(url, params=params)
+
+    return r
+
 # --------- Helpers: caching -----------
+# per_year pakai key int (tahun) -> butuh OPT_NON_STR_KEYS
+ORJSON_OPTS = orjson.OPT_NON_STR_KEYS
+
 def make_cache_key(prefix: str, params: dict) -> str:
-    raw = json.dumps(params, sort_keys=True)
-    digest = hashlib.md5(raw.encode()).hexdigest()
-    return f"{prefix}:{digest}"
+    # BLAKE2b-128 atas bentuk kanonik (key diurutkan) -> deterministik
+    h = hashlib.blake2b(digest_size=16)
+    h.update(prefix.encode())
+    h.update(b"\0")
+    h.update(orjson.dumps(params, option=orjson.OPT_SORT_KEYS))
+    return f"{prefix}:{h.hexdigest()}"
+
+# cache lokal (LRU per proses) di depan Redis buat key yang lagi panas
+LOCAL_CACHE_MAX = 1024
+LOCAL_CACHE_TTL = 60
+
+_local_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+def _local_get(key: str):
+    entry = _local_cache.get(key)
+    if entry is None:
+        return None
+
+    expiry, value = entry
+    if expiry < time.monotonic():
+        _local_cache.pop(key, None)
+        return None
+
+    _local_cache.move_to_end(key)
+    return value
+
+def _local_set(key: str, value: Any, ttl: int = LOCAL_CACHE_TTL):
+    _local_cache[key] = (time.monotonic() + min(ttl, LOCAL_CACHE_TTL), value)
+    _local_cache.move_to_end(key)
+
+    while len(_local_cache) > LOCAL_CACHE_MAX:
+        _local_cache.popitem(last=False)
+
+async def get_cache(key: str):
+    local = _local_get(key)
+    if local is not None:
+        return local
 
-def get_cache(key: str):
     try:
-        cached = redis_client.get(key)
+        cached = await redis_client.get(key)
         if cached:
-            return json.loads(cached)
+            value = orjson.loads(cached)
+            _local_set(key, value)
+            return value
     except Exception:
         pass
     return None
 
-def set_cache(key: str, value: dict, ttl: int):
+async def get_cache_raw(key: str) -> bytes | None:
+    # JSON mentah dari Redis, bisa langsung dikirim tanpa serialize ulang
+    local_key = "raw:" + key
+    local = _local_get(local_key)
+    if local is not None:
+        return local
+
+    try:
+        cached = await redis_client.get(key)
+        if cached:
+            _local_set(local_key, cached)
+            return cached
+    except Exception:
+        pass
+    return None
+
+def cached_json_response(raw: bytes) -> Response:
+    return Response(content=raw, media_type="application/json")
+
+async def set_cache(key: str, value: dict, ttl: int):
+    _local_set(key, value, ttl)
+    try:
+        await redis_client.setex(key, ttl, orjson.dumps(value, option=ORJSON_OPTS))
+    except Exception:
+        pass
+
+async def set_cache_raw(key: str, value: dict, ttl: int):
+    # buat response endpoint: lokal simpan bytes (key "raw:"), sama kayak get_cache_raw
+    raw = orjson.dumps(value, option=ORJSON_OPTS)
+    _local_set("raw:" + key, raw, ttl)
     try:
-        redis_client.setex(key, ttl, json.dumps(value))
+        await redis_client.setex(key, ttl, raw)
     except Exception:
         pass
 
+async def get_cache_many(keys: List[str]) -> List[Any]:
+    # cek cache lokal dulu, sisanya satu round-trip (MGET)
+    if not keys:
+        return []
+
+    results = [_local_get(k) for k in keys]
+    missing = [i for i, v in enumerate(results) if v is None]
+    if not missing:
+        return results
+
+    try:
+        values = await redis_client.mget([keys[i] for i in missing])
+    except Exception:
+        return results
+
+    for i, v in zip(missing, values):
+        if not v:
+            continue
+        # value rusak/lama di Redis dianggap miss, sama kayak get_cache
+        try:
+            results[i] = orjson.loads(v)
+        except Exception:
+            continue
+        _local_set(keys[i], results[i])
+
+    return results
+
+async def set_cache_many(items: List[Tuple[str, dict]], ttl: int):
+    # satu pipeline SETEX buat banyak key
+    if not items:
+        return
+    for key, value in items:
+        _local_set(key, value, ttl)
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for key, value in items:
+            pipe.setex(key, ttl, orjson.dumps(value, option=ORJSON_OPTS))
+        await pipe.execute()
+    except Exception:
+        pass
+
+def cache_result(prefix: str, ttl: int):
+    # cache di level fetcher -> hasil upstream bisa dipakai bareng antar endpoint
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            # query/DOI dinormalisasi (lowercase + strip) cuma buat key
+            key = make_cache_key(prefix, {
+                "args": [a.strip().lower() if isinstance(a, str) else a for a in args],
+                "kwargs": kwargs,
+            })
+
+            hit = await get_cache(key)
+            if hit is not None:
+                return hit
+
+            result = await func(*args, **kwargs)
+
+            # jangan cache hasil kosong / not found
+            if result:
+                await set_cache(key, result, ttl=ttl)
+
+            return result
+        return wrapper
+    return decorator
+
 def is_cacheable_response(response: dict) -> bool:
     # jangan cache kalau kosong
     if not response:
@@ -106,23 +352,22 @@ def raise_api_error(error_def: dict, details: dict | None = None):
     raise HTTPException(status_code=error_def["http_status"], detail=payload)
 
 # --------- Helpers: Lookup paper by doi -----------
-def fetch_openalex_by_doi(doi: str):
+@cache_result(prefix="fetch_openalex_by_doi", ttl=60 * 60 * 24)
+async def fetch_openalex_by_doi(doi: str):
     # OpenAlex bisa search by DOI pakai filter
     url = "https://api.openalex.org/works"
     params = {
-        "filter": f"doi:{doi.lower()}"
-    }
-    headers = {
-        "User-Agent": "ResearchMetadataAPI/1.0 (mailto:fathoniadam933@gmail.com)"
+        "filter": f"doi:{doi.lower()}",
+        "select": OPENALEX_SELECT,
     }
 
-    r = requests.get(url, params=params, headers=headers, timeout=15)
+    r = await upstream_get(url, params=params)
 
     if r.status_code == 404:
         return None
     
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
 
     results = data.get("results", [])
     if not results:
@@ -131,20 +376,18 @@ def fetch_openalex_by_doi(doi: str):
     return normalize_openalex(results[0])
 
 
-def fetch_crossref_by_doi(doi: str):
+@cache_result(prefix="fetch_crossref_by_doi", ttl=60 * 60 * 24)
+async def fetch_crossref_by_doi(doi: str):
     # CrossRef punya endpoint langsung by DOI
     url = f"https://api.crossref.org/works/{doi}"
-    headers = {
-        "User-Agent": "ResearchMetadataAPI/1.0 (mailto:fathoniadam933@gmail.com)"
-    }
 
-    r = requests.get(url, headers=headers, timeout=15)
+    r = await upstream_get(url)
 
     if r.status_code == 404:
         return None
     
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
 
     item = data.get("message")
     if not item:
@@ -153,126 +396,132 @@ def fetch_crossref_by_doi(doi: str):
     return normalize_crossref(item)
 
 
-# --------- Helpers: Trends ---------
-def extract_keywords(titles: List[str], top: int = 10):
-    words = []
-
-    for title in titles:
-        if not title:
-            continue
-
-        # lowercase + ambil huruf aja
-        tokens = re.findall(r"[a-zA-Z]+", title.lower())
-
-        for t in tokens:
-            if len(t) < 3:
-                continue
-            if t in STOPWORDS:
-                continue
-            words.append(t)
-
-    counter = Counter(words)
-    most_common = counter.most_common(top)
-
-    return [
-        {"keyword": k, "count": v}
-        for k, v in most_common
-    ]
-
-def extract_bigrams(titles: List[str], top: int = 10):
-    pairs = []
-
-    for title in titles:
-        if not title:
-            continue
-
-        tokens = re.findall(r"[a-zA-Z]+", title.lower())
-
-        # bersihin token
-        clean = [
-            t for t in tokens
-            if len(t) >= 3 and t not in STOPWORDS
-        ]
+async def fetch_openalex_by_doi_exact(doi: str):
+    # per DOI tanpa cache_result (dipakai batch); 400 = DOI gak valid buat filter
+    try:
+        paper = await fetch_openalex_by_doi.__wrapped__(doi)
+    except httpx.HTTPStatusError as e:
+        if e.response.status_code == 400:
+            return None
+        raise
 
-        # bikin bigram
-        for i in range(len(clean) - 1):
-            pair = clean[i] + " " + clean[i + 1]
-            pairs.append(pair)
+    # pastikan hasilnya memang DOI yang diminta
+    if paper and paper.get("_doi_key") == doi_key(doi):
+        return public_paper(paper)
+    return None
 
-    counter = Counter(pairs)
-    most_common = counter.most_common(top)
 
-    return [
-        {"bigram": k, "count": v}
-        for k, v in most_common
-    ]
+async def fetch_openalex_by_dois(dois: List[str]) -> Dict[str, Dict[str, Any]] | None:
+    # banyak DOI sekaligus: filter=doi:a|b|c (OR dalam satu filter)
+    url = "https://api.openalex.org/works"
+    params = {
+        "filter": "doi:" + "|".join(d.lower() for d in dois),
+        "per-page": min(len(dois), 200),
+        "select": OPENALEX_SELECT,
+    }
 
-def extract_trigrams(titles: List[str], top: int = 10):
-    triples = []
+    r = await upstream_get(url, params=params)
 
-    for title in titles:
-        if not title:
-            continue
+    # DOI aneh bikin filter gabungan ditolak (400) -> None, caller coba per DOI.
+    # 4xx lain (429, 401, 403) tetap error lewat raise_for_status
+    if r.status_code == 400:
+        return None
 
-        tokens = re.findall(r"[a-zA-Z]+", title.lower())
+    r.raise_for_status()
+    data = orjson.loads(r.content)
 
-        clean = [
-            t for t in tokens
-            if len(t) >= 3 and t not in STOPWORDS
-        ]
+    # index hasil pakai DOI lowercase tanpa prefix https://doi.org/
+    found = {}
+    for item in data.get("results", []):
+        normalized = normalize_openalex(item)
+        key = normalized.get("_doi_key")
+        if key:
+            found[key] = public_paper(normalized)
 
-        # bikin trigram
-        for i in range(len(clean) - 2):
-            triple = clean[i] + " " + clean[i + 1] + " " + clean[i + 2]
-            triples.append(triple)
+    return found
 
-    counter = Counter(triples)
-    most_common = counter.most_common(top)
 
+# --------- Helpers: Trends ---------
+def tokenize_title(title: str) -> List[str]:
+    # ambil huruf aja, lowercase per token, buang token pendek + stopword
+    if title.isascii():
+        tokens = title.translate(_TRANS).lower().split()
+    else:
+        tokens = [t.lower() for t in _TOKEN_RE.findall(title)]
     return [
-        {"trigram": k, "count": v}
-        for k, v in most_common
+        t for t in tokens
+        if len(t) >= 3 and t not in STOPWORDS
     ]
 
-def trends_per_year(results: List[Dict[str, Any]], top: int = 5):
-    # group titles by year
-    by_year: Dict[int, List[str]] = {}
-
-    for item in results:
-        year = item.get("year")
-        title = item.get("title")
-
-        if not year or not title:
+def extract_ngrams_from_tokens(token_lists: Iterable[List[str]], top: int = 10):
+    # hitung unigram/bigram/trigram dari token yang udah bersih.
+    # satu Counter per n-gram di atas chain -> loop hitungnya jalan di C
+    # (_count_elements), bukan update() per judul di Python
+    token_lists = list(token_lists)
+
+    # key pakai tuple, baru di-join pas output top-K
+    uni = Counter(chain.from_iterable(token_lists))
+    bi = Counter(chain.from_iterable(
+        zip(clean, clean[1:]) for clean in token_lists
+    ))
+    tri = Counter(chain.from_iterable(
+        zip(clean, clean[1:], clean[2:]) for clean in token_lists
+    ))
+
+    unigrams = [{"keyword": k, "count": v} for k, v in uni.most_common(top)]
+    bigrams = [{"bigram": " ".join(k), "count": v} for k, v in bi.most_common(top)]
+    trigrams = [{"trigram": " ".join(k), "count": v} for k, v in tri.most_common(top)]
+
+    return unigrams, bigrams, trigrams
+
+def trends_per_year_from_tokens(cleaned: List[Tuple[Any, List[str]]], top: int = 5):
+    # group token list by year (tanpa tokenize ulang)
+    by_year: Dict[int, List[List[str]]] = defaultdict(list)
+
+    for year, tokens in cleaned:
+        if not year:
             continue
 
-        by_year.setdefault(year, []).append(title)
+        by_year[year].append(tokens)
 
     output = {}
 
-    for year, titles in sorted(by_year.items()):
+    for year in sorted(by_year):
+        unigrams, bigrams, trigrams = extract_ngrams_from_tokens(by_year[year], top=top)
         output[year] = {
-            "unigrams": extract_keywords(titles, top=top),
-            "bigrams": extract_bigrams(titles, top=top),
-            "trigrams": extract_trigrams(titles, top=top),
+            "unigrams": unigrams,
+            "bigrams": bigrams,
+            "trigrams": trigrams,
         }
 
     return output
 
 # --------- Helpers: Normalizers ---------
 
+def doi_key(doi: Any) -> str | None:
+    # bentuk kanonik buat dedup: lowercase, tanpa prefix https://doi.org/
+    if not isinstance(doi, str):
+        return None
+    return doi.lower().removeprefix("https://doi.org/") or None
+
+
+def public_paper(item: Dict[str, Any]) -> Dict[str, Any]:
+    # buang field internal (_doi_key) sebelum dikirim ke client
+    return {k: v for k, v in item.items() if k != "_doi_key"}
+
+
 def normalize_openalex(item: Dict[str, Any]) -> Dict[str, Any]:
-    authors = []
-    for a in item.get("authorships", []):
-        author = a.get("author")
-        if author and author.get("display_name"):
-            authors.append(author["display_name"])
+    authors = [
+        name for a in item.get("authorships", ())
+        if (author := a.get("author")) and (name := author.get("display_name"))
+    ]
 
     return {
         "title": item.get("title"),
         "authors": authors,
         "year": item.get("publication_year"),
         "doi": item.get("doi"),
-        
+        "_doi_key": doi_key(item.get("doi")),
     }
 
 
@@ -281,13 +530,10 @@ def normalize_crossref(item: Dict[str, Any]) -> Dict[str, Any]:
     title_list = item.get("title", [])
     title = title_list[0] if isinstance(title_list, list) and title_list else None
 
-    authors = []
-    for a in item.get("author", []):
-        given = a.get("given", "")
-        family = a.get("family", "")
-        name = (given + " " + family).strip()
-        if name:
-            authors.append(name)
+    authors = [
+        name for a in item.get("author", ())
+        if (name := (a.get("given", "") + " " + a.get("family", "")).strip())
+    ]
 
     # year bisa ada di issued -> date-parts
     year = None
@@ -304,17 +550,19 @@ def normalize_crossref(item: Dict[str, Any]) -> Dict[str, Any]:
         "authors": authors,
         "year": year,
         "doi": doi,
-        
+        "_doi_key": doi_key(doi),
     }
 
 
 # --------- Fetchers ---------
 
-def fetch_openalex(query: str, from_year: int | None, to_year: int | None, limit: int):
+@cache_result(prefix="fetch_openalex", ttl=60 * 60 * 3)
+async def fetch_openalex(query: str, from_year: int | None, to_year: int | None, limit: int):
     url = "https://api.openalex.org/works"
     params = {
         "search": query,
-        "per-page": min(limit, 25),
+        "per-page": min(limit, OPENALEX_MAX_PER_PAGE),
+        "select": OPENALEX_SELECT,
     }
 
     # filter tahun (pakai range publication_year)
@@ -325,15 +573,11 @@ def fetch_openalex(query: str, from_year: int | None, to_year: int | None, limit
     elif to_year:
         params["filter"] = f"publication_year:0-{to_year}"
 
-    headers = {
-        "User-Agent": "ResearchMetadataAPI/1.0 (mailto:fathoniadam933@gmail.com)"
-    }
-
-    r = requests.get(url, params=params, headers=headers, timeout=15)
+    r = await upstream_get(url, params=params)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
 
-    print("OpenAlex raw count:", len(data.get("results", [])))  # 👈 debug
+    logger.debug("OpenAlex raw count: %d", len(data.get("results", [])))
 
     results = []
     for item in data.get("results", []):
@@ -341,17 +585,19 @@ def fetch_openalex(query: str, from_year: int | None, to_year: int | None, limit
         if normalized.get("doi"):   
             results.append(normalized)
 
-    print("OpenAlex normalized count:", len(results))  # 👈 debug
+    logger.debug("OpenAlex normalized count: %d", len(results))
 
     return results
 
 
 
-def fetch_crossref(query: str, from_year: int | None, to_year: int | None, limit: int):
+@cache_result(prefix="fetch_crossref", ttl=60 * 60 * 3)
+async def fetch_crossref(query: str, from_year: int | None, to_year: int | None, limit: int):
     url = "https://api.crossref.org/works"
     params = {
         "query": query,
         "rows": min(limit, 25),
+        "select": CROSSREF_SELECT,
     }
 
     # filter tanggal
@@ -364,13 +610,9 @@ def fetch_crossref(query: str, from_year: int | None, to_year: int | None, limit
     if filters:
         params["filter"] = ",".join(filters)
 
-    headers = {
-        "User-Agent": "ResearchMetadataAPI/1.0 (mailto:your-email@example.com)"
-    }
-
-    r = requests.get(url, params=params, headers=headers, timeout=15)
+    r = await upstream_get(url, params=params)
     r.raise_for_status()
-    data = r.json()
+    data = orjson.loads(r.content)
 
     items = data.get("message", {}).get("items", [])
 
@@ -386,22 +628,13 @@ def fetch_crossref(query: str, from_year: int | None, to_year: int | None, limit
 # --------- Utils ---------
 
 def deduplicate_by_doi(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # pakai _doi_key dari normalizer, item tanpa DOI selalu lolos
     seen = set()
-    unique = []
-
-    for item in items:
-        doi = item.get("doi")
-        key = doi.lower() if isinstance(doi, str) else None
-
-        if key and key in seen:
-            continue
-
-        if key:
-            seen.add(key)
-
-        unique.append(item)
-
-    return unique
+    return [
+        item for item in items
+        if (key := item.get("_doi_key")) is None
+        or (key not in seen and not seen.add(key))
+    ]
 
 
 # --------- Endpoints ---------
@@ -412,34 +645,58 @@ def health():
 
 
 @app.get("/v1/papers/search")
-def search(
+async def search(
     query: str = Query(...),
     from_year: int | None = Query(None),
     to_year: int | None = Query(None),
     limit: int = Query(20, ge=1, le=50),
+    mode: Literal["tiered", "parallel"] = Query("tiered"),
 ):
     cache_key = make_cache_key("search", {
         "query": query,
         "from_year": from_year,
         "to_year": to_year,
-        "limit": limit
+        "limit": limit,
+        "mode": mode
     })
 
-    cached = get_cache(cache_key)
+    cached = await get_cache_raw(cache_key)
     if cached:
-        return cached
+        return cached_json_response(cached)
 
     try:
         results = []
-        per_source_limit = max(1, limit // 2)
 
-        oa_results = fetch_openalex(query, from_year, to_year, per_source_limit)
-        cr_results = fetch_crossref(query, from_year, to_year, per_source_limit)
+        if mode == "parallel":
+            per_source_limit = max(1, limit // 2)
+
+            # OpenAlex + CrossRef jalan paralel
+            oa_results, cr_results = await asyncio.gather(
+                fetch_openalex(query, from_year, to_year, per_source_limit),
+                fetch_crossref(query, from_year, to_year, per_source_limit),
+                return_exceptions=True,
+            )
+
+            if isinstance(oa_results, Exception):
+                raise oa_results
+            if isinstance(cr_results, Exception):
+                raise cr_results
+        else:
+            # tiered: OpenAlex dulu, CrossRef cuma kalau hasilnya kurang
+            oa_results = deduplicate_by_doi(
+                await fetch_openalex(query, from_year, to_year, limit)
+            )
+            cr_results = []
+
+            if len(oa_results) < max(1, int(limit * TIERED_MIN_RATIO)):
+                cr_results = await fetch_crossref(
+                    query, from_year, to_year, limit - len(oa_results)
+                )
 
         results.extend(oa_results)
         results.extend(cr_results)
 
-        results = deduplicate_by_doi(results)[:limit]
+        results = [public_paper(r) for r in deduplicate_by_doi(results)[:limit]]
 
         response = {
             "query": query,
@@ -452,7 +709,7 @@ def search(
         }
 
         if is_cacheable_response(response):
-            set_cache(cache_key, response, ttl=60 * 60 * 3)  # 3 jam
+            await set_cache_raw(cache_key, response, ttl=60 * 60 * 3)  # 3 jam
 
         return response
 
@@ -470,7 +727,7 @@ def search(
 
 
 @app.get("/v1/trends")
-def trends(
+async def trends(
     query: str = Query(...),
     from_year: int | None = Query(None),
     to_year: int | None = Query(None),
@@ -485,17 +742,35 @@ def trends(
         "top": top
     })
 
-    cached = get_cache(cache_key)
+    cached = await get_cache_raw(cache_key)
     if cached:
-        return cached
+        return cached_json_response(cached)
 
     try:
+        oa_results, cr_results = await asyncio.gather(
+            fetch_openalex(query, from_year, to_year, limit),
+            fetch_crossref(query, from_year, to_year, limit),
+            return_exceptions=True,
+        )
+
+        if isinstance(oa_results, Exception):
+            raise oa_results
+        if isinstance(cr_results, Exception):
+            raise cr_results
+
         results = []
-        results.extend(fetch_openalex(query, from_year, to_year, limit))
-        results.extend(fetch_crossref(query, from_year, to_year, limit))
+        results.extend(oa_results)
+        results.extend(cr_results)
 
         results = deduplicate_by_doi(results)
-        titles = [r["title"] for r in results if r.get("title")]
+        # tokenize tiap judul sekali, dipakai global + per tahun
+        cleaned = [
+            (r.get("year"), tokenize_title(r["title"]))
+            for r in results if r.get("title")
+        ]
+        unigrams, bigrams, trigrams = extract_ngrams_from_tokens(
+            (tokens for _, tokens in cleaned), top
+        )
 
         response = {
             "query": query,
@@ -505,14 +780,14 @@ def trends(
             },
             "total_papers": len(results),
             "top": top,
-            "unigrams": extract_keywords(titles, top),
-            "bigrams": extract_bigrams(titles, top),
-            "trigrams": extract_trigrams(titles, top),
-            "per_year": trends_per_year(results, top=min(5, top)),
+            "unigrams": unigrams,
+            "bigrams": bigrams,
+            "trigrams": trigrams,
+            "per_year": trends_per_year_from_tokens(cleaned, top=min(5, top)),
         }
 
         if is_cacheable_response(response):
-            set_cache(cache_key, response, ttl=60 * 60 * 6)  # 6 jam
+            await set_cache_raw(cache_key, response, ttl=60 * 60 * 6)  # 6 jam
 
         return response
 
@@ -528,21 +803,21 @@ def trends(
         )
 
 @app.get("/v1/papers/lookup")
-def lookup_paper(
+async def lookup_paper(
     doi: str = Query(...)
 ):
     doi_clean = doi.replace("https://doi.org/", "").strip()
 
     cache_key = make_cache_key("lookup", {"doi": doi_clean})
-    cached = get_cache(cache_key)
+    cached = await get_cache_raw(cache_key)
 
     if cached:
-        return cached
+        return cached_json_response(cached)
 
     try:
-        result = fetch_openalex_by_doi(doi_clean)
+        result = await fetch_openalex_by_doi(doi_clean)
         if not result:
-            result = fetch_crossref_by_doi(doi_clean)
+            result = await fetch_crossref_by_doi(doi_clean)
 
         if not result:
             raise HTTPException(
@@ -557,10 +832,10 @@ def lookup_paper(
             )
 
         response = {
-            "paper": result
+            "paper": public_paper(result)
         }
 
-        set_cache(cache_key, response, ttl=60 * 60 * 24)  # 24 jam
+        await set_cache_raw(cache_key, response, ttl=60 * 60 * 24)  # 24 jam
 
         return response
 
@@ -578,3 +853,91 @@ def lookup_paper(
         )
 
 
+@app.post("/v1/papers/lookup/batch")
+async def lookup_papers_batch(body: BatchLookupRequest):
+    # bersihin + buang DOI dobel, urutan input tetap
+    dois = []
+    seen = set()
+    for doi in body.dois:
+        doi_clean = doi.replace("https://doi.org/", "").strip()
+        if doi_clean and doi_clean.lower() not in seen:
+            seen.add(doi_clean.lower())
+            dois.append(doi_clean)
+
+    if not dois or len(dois) > BATCH_LOOKUP_MAX:
+        raise_api_error(ERROR_INVALID_QUERY, {
+            "dois": f"Provide between 1 and {BATCH_LOOKUP_MAX} DOIs."
+        })
+
+    # key sama dengan /v1/papers/lookup biar cache-nya nyambung
+    cache_keys = [make_cache_key("lookup", {"doi": d}) for d in dois]
+    cached = await get_cache_many(cache_keys)
+
+    papers = {d: c["paper"] for d, c in zip(dois, cached) if c}
+    misses = [d for d in dois if d not in papers]
+
+    if misses:
+        try:
+            # "," nutup filter dan "|" nambah cabang OR -> DOI kayak gini
+            # gak boleh masuk filter gabungan, dicari sendiri-sendiri
+            combined = [d for d in misses if not FILTER_UNSAFE_RE.search(d)]
+            single = [d for d in misses if FILTER_UNSAFE_RE.search(d)]
+
+            found = await fetch_openalex_by_dois(combined) if combined else {}
+
+            if found is None:
+                # filter gabungan ditolak -> per DOI, biar record OpenAlex gak hilang
+                found = {}
+                single = misses
+
+            oa_results = await asyncio.gather(
+                *(fetch_openalex_by_doi_exact(d) for d in single)
+            )
+            found.update(
+                (d.lower(), paper)
+                for d, paper in zip(single, oa_results) if paper
+            )
+        except Exception:
+            raise HTTPException(
+                status_code=502,
+                detail={
+                    "status": "error",
+                    "code": 502,
+                    "message": "Upstream service error",
+                    "description": "Failed to fetch paper metadata."
+                }
+            )
+
+        for d in misses:
+            if d.lower() in found:
+                papers[d] = found[d.lower()]
+
+        # sisanya coba CrossRef (per DOI, paralel; dibatasi _CR_SEM).
+        # pakai fetcher tanpa cache_result: cache batch udah lewat MGET/pipeline
+        cr_misses = [d for d in misses if d not in papers]
+        cr_results = await asyncio.gather(
+            *(fetch_crossref_by_doi.__wrapped__(d) for d in cr_misses),
+            return_exceptions=True,
+        )
+
+        for d, result in zip(cr_misses, cr_results):
+            # error per DOI gak bikin satu batch gagal
+            if result and not isinstance(result, Exception):
+                papers[d] = public_paper(result)
+
+        await set_cache_many(
+            [
+                (key, {"paper": papers[d]})
+                for d, key in zip(dois, cache_keys)
+                if d in misses and d in papers
+            ],
+            ttl=60 * 60 * 24,  # 24 jam
+        )
+
+    results = [{"doi": d, "paper": papers.get(d)} for d in dois]
+
+    return {
+        "count": len(results),
+        "found": sum(1 for r in results if r["paper"]),
+        "results": results,
+    }